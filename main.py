@@ -5,14 +5,12 @@ import os
 # fix path so we can run from root
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "src"))
 
+import uvloop
+
 from proxy_guard.server import start
 
 if __name__ == "__main__":
-    try:
-        import uvloop
-        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
-    except ImportError:
-        pass
+    uvloop.install()
 
     try:
         asyncio.run(start())
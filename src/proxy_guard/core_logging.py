@@ -1,7 +1,28 @@
 """structured json logging and prometheus-style metrics registry"""
 
+import bisect
 import json
 import logging
+from array import array
+
+try:
+    import orjson  # pylint: disable=import-error
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None  # type: ignore[assignment]
+
+
+def json_dumps(obj) -> str:
+    """serialize to a json string, via orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def json_loads(data):
+    """parse json from str or bytes, via orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 class JSONFormatter(logging.Formatter):
@@ -16,6 +37,8 @@ class JSONFormatter(logging.Formatter):
         props = getattr(record, "props", None)
         if props:
             log_obj["props"] = props
+        if orjson is not None:
+            return orjson.dumps(log_obj).decode()
         return json.dumps(log_obj)
 
 
@@ -23,6 +46,8 @@ def setup_logger(name="ProxyGuard", level=logging.INFO):
     """create and configure a logger with json formatting"""
     handler = logging.StreamHandler()
     handler.setFormatter(JSONFormatter())
+    # level on the handler too, so filtered records never reach format()
+    handler.setLevel(level)
     log = logging.getLogger(name)
     log.setLevel(level)
 
@@ -43,64 +68,107 @@ def _format_labels(labels):
 
 
 class MetricsRegistry:
-    """collects counter and gauge metrics in prometheus exposition format"""
+    """
+    collects counter and gauge metrics in prometheus exposition format
+
+    each (name, label-key) series is interned to an integer slot on first
+    use; counter values live in one flat array('q') so a hot-path update is
+    a single dict lookup plus a C-level integer add instead of nested dict
+    traversal
+    """
 
     def __init__(self):
-        # {name: {frozen_labels_tuple: value}}
-        self._counters = {}
-        self._gauges = {}
+        # {(name, label_key): slot into the value stores}
+        self._counter_slots = {}
+        self._gauge_slots = {}
+        self._counter_vals = array("q")
+        self._gauge_vals = []  # plain list so gauge values keep their type
+        # {name: [(label_key, slot), ...]} kept sorted by label key, for output
+        self._counter_series = {}
+        self._gauge_series = {}
+        # formatted label strings, computed once per label key at registration
+        self._label_strs = {}
         self._meta = {}  # {name: ("counter"|"gauge", help_text)}
+        # every write bumps the version; generate_output reuses its last
+        # rendering as long as nothing changed underneath it
+        self._version = 0
+        self._cached_version = -1
+        self._cached_output = ""
 
     def _register(self, name, kind, help_text=""):
         if name not in self._meta:
             self._meta[name] = (kind, help_text)
 
+    def _counter_slot(self, name, key, help_text):
+        slot = self._counter_slots.get((name, key))
+        if slot is None:
+            self._register(name, "counter", help_text)
+            slot = len(self._counter_vals)
+            self._counter_vals.append(0)
+            self._counter_slots[(name, key)] = slot
+            bisect.insort(self._counter_series.setdefault(name, []), (key, slot))
+            self._label_strs.setdefault(key, _format_labels(dict(key)))
+        return slot
+
+    def _gauge_slot(self, name, key, help_text):
+        slot = self._gauge_slots.get((name, key))
+        if slot is None:
+            self._register(name, "gauge", help_text)
+            slot = len(self._gauge_vals)
+            self._gauge_vals.append(0)
+            self._gauge_slots[(name, key)] = slot
+            bisect.insort(self._gauge_series.setdefault(name, []), (key, slot))
+            self._label_strs.setdefault(key, _format_labels(dict(key)))
+        return slot
+
     def inc(self, name, labels=None, help_text=""):
         """increment a counter by 1"""
-        labels = labels or {}
-        self._register(name, "counter", help_text)
-        key = tuple(sorted(labels.items()))
-        bucket = self._counters.setdefault(name, {})
-        bucket[key] = bucket.get(key, 0) + 1
+        key = tuple(sorted(labels.items())) if labels else ()
+        self._counter_vals[self._counter_slot(name, key, help_text)] += 1
+        self._version += 1
 
     def inc_by(self, name, value, labels=None, help_text=""):
         """increment a counter by an arbitrary value"""
-        labels = labels or {}
-        self._register(name, "counter", help_text)
-        key = tuple(sorted(labels.items()))
-        bucket = self._counters.setdefault(name, {})
-        bucket[key] = bucket.get(key, 0) + value
+        key = tuple(sorted(labels.items())) if labels else ()
+        self._counter_vals[self._counter_slot(name, key, help_text)] += value
+        self._version += 1
+
+    def inc_by_key(self, name, value, key, help_text=""):
+        """
+        increment a counter by value using a pre-sorted label-tuple key
+        lets hot callers skip the per-call sort/tuple construction
+        """
+        self._counter_vals[self._counter_slot(name, key, help_text)] += value
+        self._version += 1
 
     def set_gauge(self, name, value, labels=None, help_text=""):
         """set a gauge to the given value"""
-        labels = labels or {}
-        self._register(name, "gauge", help_text)
-        key = tuple(sorted(labels.items()))
-        bucket = self._gauges.setdefault(name, {})
-        bucket[key] = value
+        key = tuple(sorted(labels.items())) if labels else ()
+        self._gauge_vals[self._gauge_slot(name, key, help_text)] = value
+        self._version += 1
 
     def generate_output(self):
         """render all metrics in prometheus exposition format"""
+        if self._version == self._cached_version:
+            return self._cached_output
         lines = []
-        all_names = set(self._counters.keys()) | set(self._gauges.keys())
-
-        for name in sorted(all_names):
-            kind, help_text = self._meta.get(name, ("counter", ""))
+        for name in sorted(self._meta):
+            kind, help_text = self._meta[name]
             if help_text:
                 lines.append(f"# HELP {name} {help_text}")
             lines.append(f"# TYPE {name} {kind}")
 
-            if name in self._counters:
-                for label_tuple, value in sorted(self._counters[name].items()):
-                    labels_str = _format_labels(dict(label_tuple))
-                    lines.append(f"{name}{labels_str} {value}")
+            for key, slot in self._counter_series.get(name, ()):
+                lines.append(
+                    f"{name}{self._label_strs[key]} {self._counter_vals[slot]}"
+                )
 
-            if name in self._gauges:
-                for label_tuple, value in sorted(self._gauges[name].items()):
-                    labels_str = _format_labels(dict(label_tuple))
-                    lines.append(f"{name}{labels_str} {value}")
+            for key, slot in self._gauge_series.get(name, ()):
+                lines.append(f"{name}{self._label_strs[key]} {self._gauge_vals[slot]}")
 
-        return "\n".join(lines) + "\n"
+        self._cached_output = "\n".join(lines) + "\n"
+        self._cached_version = self._version
+        return self._cached_output
 
 
 metrics = MetricsRegistry()
@@ -1,14 +1,17 @@
 """async connect proxy server with authentication, retry logic, and metrics"""
 
 import asyncio
+import itertools
+import os
 import pathlib
-import re
 import signal
 import socket
+import sys
+from array import array
 
 from aiohttp import web  # pylint: disable=import-error
 
-from .auth import parse_auth_header, verify_signature
+from .auth import extract_auth, scan_headers, verify_signature
 from .config import (
     BUFFER_SIZE,
     CONNECT_TIMEOUT,
@@ -16,25 +19,58 @@ from .config import (
     LOG_SAMPLE_RATE,
     METRICS_PORT,
     PROXY_PORT,
-    RE_REQUEST_LINE,
     UPSTREAM_FILE,
     UPSTREAM_LIST,
 )
-from .core_logging import logger, metrics
+from .core_logging import json_dumps, logger, metrics
 from .upstream import ProxyManager
 
-# regex to extract user-agent from client connect headers
-RE_USER_AGENT = re.compile(rb"(?i)User-Agent:\s*([^\r\n]+)")
-
 MAX_RETRIES = 3
 
+# os.splice keeps tunnel bytes entirely in kernel space (Linux, Py3.10+);
+# other platforms fall back to the streams pump
+_HAS_SPLICE = hasattr(os, "splice")
+
+# pre-sorted label keys for the tunnel byte counters
+_UP_KEY = (("direction", "up"),)
+_DOWN_KEY = (("direction", "down"),)
+
+# cap on http header blocks, enforced by the stream readers themselves
+HEADER_LIMIT = 16384
+
+# cork the CONNECT handshake into a single segment where the platform allows
+_TCP_CORK = getattr(socket, "TCP_CORK", None) or getattr(socket, "TCP_NOPUSH", None)
+
+# on linux accepted sockets inherit the listener's options, so nodelay and
+# keepalive set once at listen time save two syscalls per accept
+_INHERITS_LISTEN_OPTS = sys.platform == "linux"
+
 # global manager instance (set in start())
 MANAGER = None
 
-# deterministic sampling counter (replaces random)
-_LOG_COUNTER = 0
+# deterministic sampling: log every Nth tunnel, with N rounded up to a
+# power of two so the check is a C-level count + bitmask instead of a
+# global counter store and modulo per connection
+_LOG_MASK = (1 << (max(LOG_SAMPLE_RATE, 1) - 1).bit_length()) - 1
+_LOG_ITER = itertools.count()
 
-ACTIVE_CONNECTIONS = 0
+# active connection count in a one-slot array: mutated in place, so the
+# hot path needs no global statement or module-dict store
+_ACTIVE = array("q", [0])
+
+
+def tune_listen_socket(sock):
+    """set nodelay/keepalive and accept-path options on a listening socket"""
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # wake the acceptor only once data has arrived
+        if hasattr(socket, "TCP_DEFER_ACCEPT"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_DEFER_ACCEPT, 1)
+        if hasattr(socket, "TCP_FASTOPEN"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_FASTOPEN, 256)
+    except OSError:
+        pass
 
 
 def set_fast_socket(writer):
@@ -73,41 +109,290 @@ async def pipe(reader, writer, on_data=None):
             pass
 
 
+async def _wait_readable(loop, fd):
+    """block until fd is readable"""
+    fut = loop.create_future()
+    loop.add_reader(fd, fut.set_result, None)
+    try:
+        await fut
+    finally:
+        loop.remove_reader(fd)
+
+
+async def _wait_writable(loop, fd):
+    """block until fd is writable"""
+    fut = loop.create_future()
+    loop.add_writer(fd, fut.set_result, None)
+    try:
+        await fut
+    finally:
+        loop.remove_writer(fd)
+
+
+def _shutdown_wr(fd):
+    """half-close the write side of a socket fd, propagating eof downstream"""
+    try:
+        sock = socket.socket(fileno=os.dup(fd))
+    except OSError:
+        return
+    try:
+        sock.shutdown(socket.SHUT_WR)
+    except OSError:
+        pass
+    finally:
+        sock.close()
+
+
+async def _splice_pump(src_fd, dst_fd, on_data=None):
+    """
+    one-directional zero-copy pump
+    moves bytes src socket -> kernel pipe -> dst socket without touching
+    userspace, until eof or error; eof is then half-closed through to dst
+    so the reverse direction can finish draining
+    """
+    loop = asyncio.get_running_loop()
+    pipe_r, pipe_w = os.pipe()
+    flags = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+    try:
+        while True:
+            try:
+                moved = os.splice(src_fd, pipe_w, BUFFER_SIZE, flags=flags)
+            except BlockingIOError:
+                await _wait_readable(loop, src_fd)
+                continue
+            if moved == 0:
+                break
+            if on_data:
+                on_data(moved)
+            while moved:
+                try:
+                    moved -= os.splice(pipe_r, dst_fd, moved, flags=flags)
+                except BlockingIOError:
+                    await _wait_writable(loop, dst_fd)
+    except (asyncio.CancelledError, ConnectionError):
+        pass
+    except OSError:
+        logger.debug("splice pump error", exc_info=True)
+    finally:
+        _shutdown_wr(dst_fd)
+        os.close(pipe_r)
+        os.close(pipe_w)
+
+
+class TunnelProtocol(asyncio.BufferedProtocol):
+    """
+    raw protocol for the bulk tunnel phase
+    forwards received data straight to the peer transport, with no
+    per-chunk future/drain pair; backpressure propagates by pausing the
+    peer's reads while our send buffer is over the high-water mark
+
+    as a BufferedProtocol the loop recv_into's one preallocated buffer
+    per direction instead of allocating a bytes object per chunk
+    """
+
+    def __init__(self, orig_protocol, on_data=None):
+        self.transport = None
+        self.peer = None
+        self.on_data = on_data
+        self.lost = False
+        self.read_eof = False
+        # future shared by both directions, set once both sides are gone
+        self.shutdown = None
+        # the stream protocol we displaced; connection_lost is forwarded so
+        # writer.close()/wait_closed() in handle_client still complete
+        self._orig_protocol = orig_protocol
+        self._buf = bytearray(BUFFER_SIZE)
+        self._view = memoryview(self._buf)
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def get_buffer(self, sizehint):
+        return self._view
+
+    def buffer_updated(self, nbytes):
+        if self.on_data:
+            self.on_data(nbytes)
+        if self.peer is None:
+            return
+        peer_transport = self.peer.transport
+        peer_transport.write(self._view[:nbytes])
+        if peer_transport.get_write_buffer_size():
+            # the transport may still reference our buffer (uvloop keeps
+            # queued writes zero-copy); hand it over and start a fresh one
+            self._buf = bytearray(BUFFER_SIZE)
+            self._view = memoryview(self._buf)
+
+    def pause_writing(self):
+        # our send buffer is full; stop the peer feeding it
+        if self.peer is not None:
+            self.peer.transport.pause_reading()
+
+    def resume_writing(self):
+        if self.peer is not None:
+            self.peer.transport.resume_reading()
+
+    def eof_received(self):
+        # half-close: pass the eof through and keep the reverse direction
+        # flowing; once both directions have drained, tear the tunnel down
+        self.read_eof = True
+        peer = self.peer
+        if peer is not None:
+            try:
+                peer.transport.write_eof()
+            except (OSError, RuntimeError):
+                pass
+            if peer.read_eof:
+                self.transport.close()
+        return True
+
+    def connection_lost(self, exc):
+        # closing the peer transport lets the kernel surface eof to the other
+        # side naturally; no tasks, no FIRST_COMPLETED wait, no cancel
+        self.lost = True
+        peer = self.peer
+        if peer is not None:
+            peer.transport.close()
+            if peer.lost and not self.shutdown.done():
+                self.shutdown.set_result(None)
+        elif not self.shutdown.done():
+            self.shutdown.set_result(None)
+        if self._orig_protocol is not None:
+            self._orig_protocol.connection_lost(exc)
+
+
+async def _flush_buffered(reader, writer, us_reader, us_writer, update_up, update_down):
+    """forward any bytes the stream readers buffered before a pump handoff"""
+    for stream_reader, dst, on_data in (
+        (reader, us_writer, update_up),
+        (us_reader, writer, update_down),
+    ):
+        buffered = bytes(stream_reader._buffer)  # pylint: disable=protected-access
+        if buffered:
+            stream_reader._buffer.clear()  # pylint: disable=protected-access
+            if on_data:
+                on_data(len(buffered))
+            dst.write(buffered)
+            await dst.drain()
+
+
+def _sock_fd(writer):
+    """return the writer's socket fd, or -1 when there is no real socket"""
+    sock = writer.get_extra_info("socket")
+    if sock is None:
+        return -1
+    try:
+        fd = sock.fileno()
+    except (AttributeError, OSError, TypeError):
+        return -1
+    return fd if isinstance(fd, int) else -1
+
+
+async def _tunnel_protocols(
+    reader, writer, us_reader, us_writer, update_up, update_down
+):
+    """
+    swap both connections from the streams machinery to TunnelProtocol
+    for the bulk phase, then wait for either side to drop
+    """
+    client_transport = writer.transport
+    us_transport = us_writer.transport
+
+    client_transport.pause_reading()
+    us_transport.pause_reading()
+    await _flush_buffered(reader, writer, us_reader, us_writer, update_up, update_down)
+
+    client_proto = TunnelProtocol(client_transport.get_protocol(), update_up)
+    us_proto = TunnelProtocol(us_transport.get_protocol(), update_down)
+    client_proto.peer, us_proto.peer = us_proto, client_proto
+    client_proto.transport, us_proto.transport = client_transport, us_transport
+    shutdown = asyncio.get_running_loop().create_future()
+    client_proto.shutdown = us_proto.shutdown = shutdown
+    client_transport.set_protocol(client_proto)
+    us_transport.set_protocol(us_proto)
+    client_transport.resume_reading()
+    us_transport.resume_reading()
+
+    # whichever side drops first closes its peer in connection_lost; the
+    # future resolves once both transports are gone
+    await shutdown
+
+
+async def _tunnel_splice(reader, writer, us_reader, us_writer, update_up, update_down):
+    """
+    pump both tunnel directions with splice
+    the stream transports are paused and the raw fds dup'd so the event
+    loop doesn't fight the transports over fd ownership
+    """
+    client_sock = writer.get_extra_info("socket")
+    us_sock = us_writer.get_extra_info("socket")
+
+    writer.transport.pause_reading()
+    us_writer.transport.pause_reading()
+    await _flush_buffered(reader, writer, us_reader, us_writer, update_up, update_down)
+
+    client_fd = os.dup(client_sock.fileno())
+    us_fd = os.dup(us_sock.fileno())
+    try:
+        # each pump half-closes its destination on eof, so both directions
+        # run to completion instead of one cancelling the other mid-drain
+        await asyncio.gather(
+            _splice_pump(client_fd, us_fd, update_up),
+            _splice_pump(us_fd, client_fd, update_down),
+        )
+    finally:
+        os.close(client_fd)
+        os.close(us_fd)
+
+
 async def _try_upstream(upstream, target, user_agent):
     """
     attempt to connect through an upstream proxy
     returns (us_reader, us_writer) on success, raises on failure
     """
     us_reader, us_writer = await asyncio.wait_for(
-        asyncio.open_connection(upstream.host, upstream.port),
+        asyncio.open_connection(upstream.host, upstream.port, limit=HEADER_LIMIT),
         timeout=CONNECT_TIMEOUT,
     )
     set_fast_socket(us_writer)
+    sock = us_writer.get_extra_info("socket")
 
-    req = f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n"
+    # target and user_agent are bytes straight from the header scan; the
+    # constant fragments and the per-upstream auth line are prebuilt, so
+    # the request goes out as one writelines call with no formatting
+    req = [b"CONNECT ", target, b" HTTP/1.1\r\nHost: ", target, b"\r\n"]
     if user_agent:
-        req += f"User-Agent: {user_agent}\r\n"
-    req += "Proxy-Connection: Keep-Alive\r\n"
-    if upstream.auth:
-        req += f"Proxy-Authorization: Basic {upstream.auth}\r\n"
-    req += "\r\n"
+        req += [b"User-Agent: ", user_agent, b"\r\n"]
+    req += [b"Proxy-Connection: Keep-Alive\r\n", upstream.auth_line, b"\r\n"]
+
+    # cork while the request goes out so the handshake leaves as one segment
+    if _TCP_CORK is not None and sock is not None:
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 1)
+        except OSError:
+            pass
 
-    us_writer.write(req.encode())
+    us_writer.writelines(req)
     await us_writer.drain()
 
-    response_buffer = bytearray()
-    while b"\r\n\r\n" not in response_buffer:
-        chunk = await asyncio.wait_for(
-            us_reader.read(4096),
+    try:
+        response = await asyncio.wait_for(
+            us_reader.readuntil(b"\r\n\r\n"),
             timeout=CONNECT_TIMEOUT,
         )
-        if not chunk:
-            raise ConnectionError("upstream closed connection")
-        response_buffer.extend(chunk)
-        if len(response_buffer) > 16384:
-            raise ConnectionError("upstream response headers too large")
+    except asyncio.IncompleteReadError as exc:
+        raise ConnectionError("upstream closed connection") from exc
+    except asyncio.LimitOverrunError as exc:
+        raise ConnectionError("upstream response headers too large") from exc
+    finally:
+        # uncork before the bulk phase; nodelay is already set
+        if _TCP_CORK is not None and sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, _TCP_CORK, 0)
+            except OSError:
+                pass
 
-    first_line = response_buffer.split(b"\r\n", 1)[0]
+    first_line = response.split(b"\r\n", 1)[0]
     if b"200" not in first_line:
         us_writer.close()
         raise ConnectionError(f"upstream refused: {first_line.decode(errors='ignore')}")
@@ -122,51 +407,50 @@ async def handle_client(reader, writer):
     performs authentication, connects to an upstream proxy (with retries)
     and establishes a tunnel
     """
-    global ACTIVE_CONNECTIONS, _LOG_COUNTER  # pylint: disable=global-statement
-    ACTIVE_CONNECTIONS += 1
+    _ACTIVE[0] += 1
     metrics.set_gauge(
         "pg_active_connections",
-        ACTIVE_CONNECTIONS,
+        _ACTIVE[0],
         help_text="current active client connections",
     )
 
-    set_fast_socket(writer)
+    if not _INHERITS_LISTEN_OPTS:
+        set_fast_socket(writer)
     cid = "unknown"
     us_writer = None
     upstream = None
 
     try:
         # ---------- 1. read client headers ----------
-        header_buffer = bytearray()
-        while b"\r\n\r\n" not in header_buffer:
-            chunk = await reader.read(8192)
-            if not chunk:
-                return
-            header_buffer.extend(chunk)
-            if len(header_buffer) > 16384:
-                logger.warning("client header too large")
-                writer.write(b"HTTP/1.1 413 Payload Too Large\r\n\r\n")
-                await writer.drain()
-                return
-
-        header_block = bytes(header_buffer)
+        # readuntil keeps the terminator scan inside asyncio's buffered
+        # reader; the 16 KiB cap is enforced via the stream limit
+        try:
+            header_block = await asyncio.wait_for(
+                reader.readuntil(b"\r\n\r\n"),
+                timeout=CONNECT_TIMEOUT,
+            )
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+            return
+        except asyncio.LimitOverrunError:
+            logger.warning("client header too large")
+            writer.write(b"HTTP/1.1 413 Payload Too Large\r\n\r\n")
+            await writer.drain()
+            return
 
         # ---------- 2. parse request line ----------
-        match_req = RE_REQUEST_LINE.search(header_block)
-        if not match_req:
+        scanned = scan_headers(header_block)
+        target = scanned.get("target")
+        if target is None:
             writer.write(b"HTTP/1.1 405 Method Not Allowed\r\n\r\n")
             await writer.drain()
             return
 
-        target = match_req.group(1).decode()
-
         # ---------- 2b. extract client user-agent ----------
-        ua_match = RE_USER_AGENT.search(header_block)
-        user_agent = ua_match.group(1).decode().strip() if ua_match else None
+        user_agent = scanned.get("user_agent")
 
         # ---------- 3. authentication ----------
         if ENABLE_AUTH:
-            auth_val = parse_auth_header(header_block)
+            auth_val = extract_auth(scanned)
             if not auth_val:
                 logger.warning("auth header missing")
                 writer.write(
@@ -195,7 +479,7 @@ async def handle_client(reader, writer):
 
         for attempt in range(MAX_RETRIES):
             upstream = MANAGER.get_proxy(
-                active_count=ACTIVE_CONNECTIONS,
+                active_count=_ACTIVE[0],
                 client_id=cid,
                 exclude=tried,
             )
@@ -257,38 +541,63 @@ async def handle_client(reader, writer):
 
         # ---------- 8. metrics and sample logging ----------
         metrics.inc("pg_tunnels", {"client": cid})
-        _LOG_COUNTER = (_LOG_COUNTER + 1) % LOG_SAMPLE_RATE
-        if _LOG_COUNTER == 0:
+        if next(_LOG_ITER) & _LOG_MASK == 0:
             logger.info(
                 "tunnel sample",
-                extra={"props": {"client": cid, "dst": target, "proxy": upstream.host}},
+                extra={
+                    "props": {
+                        "client": cid,
+                        "dst": target.decode(),
+                        "proxy": upstream.host,
+                    }
+                },
             )
 
         # ---------- 9. start bidirectional pumping ----------
+        # accumulate byte counts locally and flush to the registry once per
+        # tunnel instead of once per chunk
+        up_count = [0]
+        down_count = [0]
+
         def update_up(n):
-            upstream.bytes_sent += n
-            metrics.inc_by("pg_bytes_total", n, {"direction": "up"})
+            up_count[0] += n
 
         def update_down(n):
-            upstream.bytes_received += n
-            metrics.inc_by("pg_bytes_total", n, {"direction": "down"})
-
-        t1 = asyncio.create_task(pipe(reader, us_writer, update_up))
-        t2 = asyncio.create_task(pipe(us_reader, writer, update_down))
-        _done, pending = await asyncio.wait(
-            [t1, t2],
-            return_when=asyncio.FIRST_COMPLETED,
-        )
-        for task in pending:
-            task.cancel()
-        if pending:
-            await asyncio.wait(pending)
+            down_count[0] += n
+
+        real_sockets = _sock_fd(writer) >= 0 and _sock_fd(us_writer) >= 0
+        if _HAS_SPLICE and real_sockets:
+            await _tunnel_splice(
+                reader, writer, us_reader, us_writer, update_up, update_down
+            )
+        elif real_sockets:
+            await _tunnel_protocols(
+                reader, writer, us_reader, us_writer, update_up, update_down
+            )
+        else:
+            t1 = asyncio.create_task(pipe(reader, us_writer, update_up))
+            t2 = asyncio.create_task(pipe(us_reader, writer, update_down))
+            _done, pending = await asyncio.wait(
+                [t1, t2],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+        if up_count[0]:
+            upstream.bytes_sent += up_count[0]
+            metrics.inc_by_key("pg_bytes_total", up_count[0], _UP_KEY)
+        if down_count[0]:
+            upstream.bytes_received += down_count[0]
+            metrics.inc_by_key("pg_bytes_total", down_count[0], _DOWN_KEY)
 
     except Exception:  # pylint: disable=broad-exception-caught
         logger.debug("unhandled exception in handle_client", exc_info=True)
     finally:
-        ACTIVE_CONNECTIONS -= 1
-        metrics.set_gauge("pg_active_connections", ACTIVE_CONNECTIONS)
+        _ACTIVE[0] -= 1
+        metrics.set_gauge("pg_active_connections", _ACTIVE[0])
         if upstream:
             upstream.active_connections -= 1
         try:
@@ -322,7 +631,7 @@ async def start():
         data = []
         if MANAGER:
             data = MANAGER.get_all_proxies()
-        return web.json_response(data)
+        return web.json_response(data, dumps=json_dumps)
 
     app.router.add_get("/api/proxies", get_proxies)
 
@@ -330,8 +639,9 @@ async def start():
         return web.json_response(
             {
                 "auth_enabled": ENABLE_AUTH,
-                "active_connections": ACTIVE_CONNECTIONS,
-            }
+                "active_connections": _ACTIVE[0],
+            },
+            dumps=json_dumps,
         )
 
     app.router.add_get("/api/status", get_status)
@@ -351,8 +661,15 @@ async def start():
 
     # main proxy server
     server = await asyncio.start_server(
-        handle_client, "0.0.0.0", PROXY_PORT, backlog=4096
+        handle_client,
+        "0.0.0.0",
+        PROXY_PORT,
+        backlog=4096,
+        limit=HEADER_LIMIT,
+        reuse_port=hasattr(socket, "SO_REUSEPORT"),
     )
+    for sock in server.sockets:
+        tune_listen_socket(sock)
 
     # graceful shutdown
     loop = asyncio.get_running_loop()
@@ -376,9 +693,10 @@ async def start():
     # give in-flight tunnels a moment to finish
     logger.info("waiting for active connections to drain...")
     for _ in range(30):  # up to 30 seconds
-        if ACTIVE_CONNECTIONS <= 0:
+        if _ACTIVE[0] <= 0:
             break
         await asyncio.sleep(1)
 
+    await MANAGER.close()
     await runner.cleanup()
     logger.info("shutdown complete")
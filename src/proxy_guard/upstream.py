@@ -2,29 +2,117 @@
 
 import asyncio
 import base64
+import collections
+import ctypes
+import ctypes.util
+import heapq
+import itertools
 import os
 import random
+import sys
 import time
+from array import array
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
-from urllib.parse import urlparse
-
-import aiohttp  # pylint: disable=import-error
-
-from .config import HEALTH_CHECK_INTERVAL, HIGH_USAGE_THRESHOLD, MAX_LATENCY, STICKY_TTL
-from .core_logging import logger
+from operator import attrgetter
+from typing import Dict, List, Optional, Sequence, Tuple, cast
+
+from .config import (
+    HEALTH_CHECK_INTERVAL,
+    HIGH_USAGE_THRESHOLD,
+    MAX_LATENCY,
+    PICK_CHOICES,
+    PROBE_CONCURRENCY,
+    STICKY_MAX_CLIENTS,
+    STICKY_TTL,
+)
+from .core_logging import json_loads, logger
 
 CIRCUIT_BREAKER_THRESHOLD = 3
 
-
-@dataclass
+# how long a pooled health-probe socket may be reused before a full re-probe
+PROBE_SOCKET_TTL = 300.0
+
+# how long a rendered status snapshot stays fresh for /api/proxies polls
+STATUS_CACHE_TTL = 1.0
+
+# bound once; the ranking key for top_k_by_latency
+_LAT_KEY = attrgetter("latency")
+
+# inotify via ctypes (linux): the proxy file watch is event-driven instead of
+# stat-polling every health cycle; elsewhere the mtime poll remains
+_IN_MODIFY = 0x002
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_LIBC = None
+if sys.platform == "linux":
+    try:
+        _LIBC = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+    except OSError:  # pragma: no cover - no usable libc
+        _LIBC = None
+
+
+def _parse_proxy_url(
+    url: str,
+) -> Tuple[Optional[str], Optional[int], Optional[str]]:
+    """
+    minimal parser for scheme://[user:pass@]host[:port] proxy urls
+    returns (host, port, auth_b64); (None, None, None) when unparseable
+
+    urlparse is a general-purpose pure-python parser and dominates bulk
+    node construction; these urls only ever take the one shape above
+    """
+    _, sep, rest = url.partition("://")
+    if not sep:
+        return None, None, None
+    # drop anything from the first "/" on: proxy lists commonly carry a
+    # trailing slash, and urlparse accepted those too
+    rest = rest.partition("/")[0]
+    userinfo, sep, hostport = rest.rpartition("@")
+    auth = base64.b64encode(userinfo.encode()).decode() if sep else None
+    if hostport.startswith("["):
+        # bracketed ipv6 literal: [::1] or [::1]:8080. the brackets are
+        # stripped like urlparse's hostname does, since getaddrinfo wants
+        # the bare address
+        host, sep, port_s = hostport.partition("]")
+        if not sep:
+            return None, None, None
+        host = host[1:]
+        port = None
+        if port_s:
+            if port_s[0] != ":" or not port_s[1:].isdecimal():
+                return None, None, None
+            port = int(port_s[1:])
+        return host or None, port, auth
+    host, sep, port_s = hostport.rpartition(":")
+    port = None
+    if sep:
+        # isdecimal matches exactly what int() accepts
+        if not port_s.isdecimal():
+            return None, None, None
+        port = int(port_s)
+    else:
+        host = hostport
+    return host or None, port, auth
+
+
+@dataclass(slots=True)
 class ProxyNode:  # pylint: disable=too-many-instance-attributes
-    """represents a single upstream proxy with health and connection state"""
+    """
+    represents a single upstream proxy with health and connection state
+
+    slotted so attribute loads in the per-request scoring loop are fixed
+    offsets, and per-node memory stays small with large pools
+    """
 
     url: str
     host: str = field(init=False)
     port: int = field(init=False)
     auth: Optional[str] = field(init=False)
+    auth_line: bytes = field(init=False, default=b"")
+    probe_req: bytes = field(init=False, default=b"")
     is_healthy: bool = True
     latency: float = -1.0
     last_checked: float = 0.0
@@ -43,26 +131,83 @@ class ProxyNode:  # pylint: disable=too-many-instance-attributes
 
     def __post_init__(self):
         try:
-            parsed = urlparse(self.url)
-            self.host, self.port = parsed.hostname, parsed.port
-            if parsed.username:
-                self.auth = base64.b64encode(
-                    f"{parsed.username}:{parsed.password}".encode()
-                ).decode()
-            else:
-                self.auth = None
+            self.host, self.port, self.auth = _parse_proxy_url(self.url)
+            # ready-to-send header line so the connect path doesn't rebuild it
+            self.auth_line = (
+                f"Proxy-Authorization: Basic {self.auth}\r\n".encode()
+                if self.auth
+                else b""
+            )
+            # full health-probe request, built once instead of per check
+            self.probe_req = (
+                b"CONNECT httpbin.org:443 HTTP/1.1\r\nHost: httpbin.org:443\r\n"
+                + self.auth_line
+                + b"\r\n"
+            )
         except (ValueError, AttributeError):
             self.is_healthy = False
 
+    @classmethod
+    def _from_parsed(cls, url, host, port, auth):
+        """
+        build a node from already-parsed fields, bypassing __init__
+
+        the bulk ingest and reload paths parse before constructing (for
+        dedup and validity checks), so going through the public ctor would
+        re-run the parse and the dataclass init dispatch per line; this
+        fills the slots directly instead
+        """
+        node = object.__new__(cls)
+        node.url = url
+        node.host = host
+        node.port = port
+        node.auth = auth
+        node.auth_line = (
+            f"Proxy-Authorization: Basic {auth}\r\n".encode() if auth else b""
+        )
+        node.probe_req = (
+            b"CONNECT httpbin.org:443 HTTP/1.1\r\nHost: httpbin.org:443\r\n"
+            + node.auth_line
+            + b"\r\n"
+        )
+        node.is_healthy = True
+        node.latency = -1.0
+        node.last_checked = 0.0
+        node.location = "Unknown"
+        node.country_code = None
+        node.exit_ip = None
+        node.active_connections = 0
+        node.total_connections = 0
+        node.bytes_sent = 0
+        node.bytes_received = 0
+        node.consecutive_failures = 0
+        return node
+
     def record_success(self):
-        """reset consecutive failure count after a successful connection"""
+        """reset failure count and restore health after a successful connection"""
         self.consecutive_failures = 0
+        self.is_healthy = True
+
+    def record_latency(self, sample_ms: float):
+        """
+        fold a probe sample into the latency estimate as an ema
+
+        one slow probe (gc pause, transient congestion) then shifts the
+        selection weight a quarter of the way instead of all of it; the
+        first sample after an unhealthy stretch seeds the estimate directly
+        """
+        if self.latency >= 0:
+            self.latency = self.latency * 0.75 + sample_ms * 0.25
+        else:
+            self.latency = sample_ms
 
     def record_failure(self):
         """increment failure count and trip circuit breaker if threshold reached"""
         self.consecutive_failures += 1
-        if self.consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
-            self.is_healthy = False
+        # branchless trip: health is the comparison itself, so repeated
+        # failures past the threshold cost one compare and no jump
+        self.is_healthy = self.consecutive_failures < CIRCUIT_BREAKER_THRESHOLD
+        if self.consecutive_failures == CIRCUIT_BREAKER_THRESHOLD:
             logger.warning(
                 "circuit breaker tripped for %s:%s after %d consecutive failures",
                 self.host,
@@ -71,6 +216,59 @@ class ProxyNode:  # pylint: disable=too-many-instance-attributes
             )
 
 
+class AsyncFileWatcher:
+    """
+    event-driven watch on a single file, via inotify wired into the loop
+
+    the containing directory is watched so rewrites via rename (the common
+    atomic update pattern) are seen as well; the callback runs on the event
+    loop as soon as the kernel reports a change, instead of a change waiting
+    out a poll interval. callers keep their mtime poll as the fallback when
+    the watch can't start (non-linux, missing libc, watch limits)
+    """
+
+    def __init__(self, file_path: str, callback):
+        self._file_path = file_path
+        self._callback = callback
+        self._fd: Optional[int] = None
+
+    def start(self) -> bool:
+        """register the watch; returns True when it is active"""
+        if _LIBC is None or not self._file_path:
+            return False
+        fd = _LIBC.inotify_init1(os.O_NONBLOCK)
+        if fd < 0:
+            return False
+        watch_dir = os.path.dirname(os.path.abspath(self._file_path)) or "."
+        mask = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        if _LIBC.inotify_add_watch(fd, watch_dir.encode(), mask) < 0:
+            os.close(fd)
+            return False
+        self._fd = fd
+        asyncio.get_running_loop().add_reader(fd, self._on_event)
+        logger.info("watching %s for changes", self._file_path)
+        return True
+
+    def _on_event(self):
+        """drain pending events and fire the callback"""
+        try:
+            os.read(self._fd, 4096)
+        except (BlockingIOError, OSError):
+            return
+        self._callback()
+
+    def stop(self):
+        """tear down the watch, if one is active"""
+        if self._fd is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(self._fd)
+        except RuntimeError:
+            pass
+        os.close(self._fd)
+        self._fd = None
+
+
 class ProxyManager:
     """manages a pool of upstream proxies with health checking and load balancing"""
 
@@ -78,56 +276,119 @@ class ProxyManager:
         self.proxies: List[ProxyNode] = []
         self._file_path = file_path
         self._file_mtime: float = 0.0
-        self._sticky_map: Dict[str, Tuple[ProxyNode, float]] = {}
-        self._env_urls: set = set()
-
-        candidates = []
-
-        # 1. load from raw list (env var)
-        for r in raw_list:
-            if r.strip():
-                candidates.append(r.strip())
-                self._env_urls.add(r.strip())
+        # sticky entries expire STICKY_TTL after insert and are never
+        # refreshed, so insertion order is expiry order: expired entries are
+        # drained from the front in O(expired) on writes instead of a
+        # periodic full sweep. expiries are monotonic seconds, so wall-clock
+        # jumps can't mass-expire or pin entries
+        self._sticky_map: collections.OrderedDict[
+            str, Tuple[ProxyNode, float]
+        ] = collections.OrderedDict()
+        # long-lived probe sockets per node url: (reader, writer, created)
+        # a warm socket stands in for a full handshake on the next cycle
+        self._probe_sockets: Dict[
+            str, Tuple[asyncio.StreamReader, asyncio.StreamWriter, float]
+        ] = {}
+        # caps concurrent probes so a large pool doesn't burst N parallel
+        # connects into the event loop every health cycle
+        self._probe_sem = asyncio.Semaphore(PROBE_CONCURRENCY)
+        # reloads fire from the watcher callback shortly after the kernel
+        # sees the change; the watch itself starts inside the health loop.
+        # the mtime check in _reload_file filters events for unrelated files
+        self._watcher = AsyncFileWatcher(file_path or "", self._schedule_reload)
+        self._reload_handle: Optional[asyncio.TimerHandle] = None
+        # short-lived snapshot for the status endpoint
+        self._status_cache: List[dict] = []
+        self._status_cache_time: float = 0.0
+        # private generator: draws don't contend on the module-level rng
+        # shared by every other random consumer in the process
+        self._rng = random.Random(os.urandom(8))
+        # lazily-built sorted host view for status/reporting consumers,
+        # invalidated when the pool membership changes
+        self._sorted_hosts: Optional[List[str]] = None
+        # alias-table sampler state, rebuilt lazily when marked dirty by a
+        # probe or reload; selection then costs O(1) per draw instead of a
+        # full scan of the pool
+        self._alias_dirty = True
+        self._alias_nodes: List[ProxyNode] = []
+        self._alias_prob = array("Q")
+        self._alias_idx = array("L")
+        self._healthy_nodes: List[ProxyNode] = []
+
+        # 1. normalize the env list once
+        raw = [s for s in (x.strip() for x in raw_list) if s]
+        self._env_urls: set = set(raw)
 
         # 2. load from file
+        file_urls: List[str] = []
         if file_path:
             file_urls = self._read_file(file_path)
-            candidates.extend(file_urls)
             try:
                 self._file_mtime = os.path.getmtime(file_path)
             except OSError:
                 pass
 
-        # 3. parse candidates (deduplicate by url)
-        seen = set()
-        for r in candidates:
-            if r in seen:
+        # 3. parse candidates; dict.fromkeys dedups raw strings while keeping
+        # order, and the parsed-key set catches spelling variants of the
+        # same endpoint. the url-keyed mapping is the canonical pool:
+        # reloads diff against it so surviving nodes keep their identity
+        # and accumulated state
+        self._nodes_by_url: Dict[str, ProxyNode] = {}
+        seen_keys = set()
+        for r in dict.fromkeys(itertools.chain(raw, file_urls)):
+            host, port, auth = _parse_proxy_url(r)
+            if not host:
                 continue
-            seen.add(r)
-            try:
-                node = ProxyNode(r)
-                if node.is_healthy and node.host:
-                    self.proxies.append(node)
-            except Exception:  # pylint: disable=broad-exception-caught
-                pass
+            key = (host, port, auth)
+            if key not in seen_keys:
+                seen_keys.add(key)
+                # parse-first: invalid and duplicate lines never pay for a
+                # node allocation, and valid ones skip the ctor's re-parse
+                self._nodes_by_url[r] = ProxyNode._from_parsed(r, host, port, auth)
+        self.proxies = list(self._nodes_by_url.values())
 
         logger.info("initialized with %d upstreams", len(self.proxies))
 
     @staticmethod
     def _read_file(file_path: str) -> List[str]:
         """read proxy urls from a text file, one per line"""
-        urls = []
         try:
-            with open(file_path, "r", encoding="utf-8") as fh:
-                for line in fh:
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        urls.append(line)
+            # one raw read plus a C-level splitlines beats iterating the
+            # file object line by line for multi-thousand-entry lists; the
+            # bytes mode also skips the full-file utf-8 decode pass, so
+            # comments and blanks are filtered before any decoding and only
+            # the kept lines pay for a str
+            with open(file_path, "rb") as fh:
+                data = fh.read()
         except FileNotFoundError:
             logger.debug("proxy file not found: %s", file_path)
+            return []
         except OSError as exc:
             logger.error("error reading proxy file %s: %s", file_path, exc)
-        return urls
+            return []
+        return [
+            line.decode("utf-8")
+            for line in (raw.strip() for raw in data.splitlines())
+            if line and not line.startswith(b"#")
+        ]
+
+    def _schedule_reload(self):
+        """
+        debounce watch events into one reload per window
+
+        editors save through several writes (content, backup, rename); a
+        burst schedules a single deferred reload instead of re-parsing the
+        file per event, and the timer fires after the last write has landed
+        """
+        if self._reload_handle is not None:
+            return
+        self._reload_handle = asyncio.get_running_loop().call_later(
+            0.1, self._run_reload
+        )
+
+    def _run_reload(self):
+        self._reload_handle = None
+        self._reload_file()
 
     def _reload_file(self):
         """hot-reload proxy list from file if it has been modified"""
@@ -141,95 +402,350 @@ class ProxyManager:
             return
 
         self._file_mtime = mtime
-        new_urls = self._read_file(self._file_path)
-
-        existing_by_url = {p.url: p for p in self.proxies}
-        new_proxies = []
-        seen = set()
 
-        for url in new_urls:
-            if url in seen:
-                continue
-            seen.add(url)
-            if url in existing_by_url:
-                new_proxies.append(existing_by_url[url])
-            else:
-                try:
-                    node = ProxyNode(url)
-                    if node.is_healthy and node.host:
-                        new_proxies.append(node)
-                except Exception:  # pylint: disable=broad-exception-caught
-                    pass
-
-        # keep env-based proxies that aren't in the file
-        for p in self.proxies:
-            if p.url in self._env_urls and p.url not in seen:
-                new_proxies.append(p)
-                seen.add(p.url)
+        # desired pool: the file's urls plus env-based proxies already in the
+        # pool that aren't in the file
+        by_url = self._nodes_by_url
+        desired = dict.fromkeys(self._read_file(self._file_path))
+        for url in by_url:
+            if url in self._env_urls and url not in desired:
+                desired[url] = None
+
+        # diff against the live mapping rather than rebuilding it: a touch
+        # with no content change is a no-op, and a one-line edit costs one
+        # node construction or deletion instead of O(N) churn. survivors
+        # keep their identity, so health and traffic stats carry over
+        if desired.keys() == by_url.keys():
+            logger.debug("proxy file unchanged, skipping reload")
+            return
 
-        added = len(new_proxies) - len(self.proxies)
-        self.proxies = new_proxies
+        for url in [u for u in by_url if u not in desired]:
+            del by_url[url]
+            # a decommissioned upstream is never probed again, so its warm
+            # keepalive socket would otherwise stay open until shutdown
+            pooled = self._probe_sockets.pop(url, None)
+            if pooled is not None:
+                pooled[1].close()
+        seen_keys = {(p.host, p.port, p.auth) for p in by_url.values()}
+        for url in desired:
+            if url not in by_url:
+                host, port, auth = _parse_proxy_url(url)
+                if not host:
+                    continue
+                key = (host, port, auth)
+                if key not in seen_keys:
+                    seen_keys.add(key)
+                    by_url[url] = ProxyNode._from_parsed(url, host, port, auth)
+
+        added = len(by_url) - len(self.proxies)
+        self.proxies = list(by_url.values())
+        self._alias_dirty = True
+        self._sorted_hosts = None
         logger.info(
             "reloaded proxy file: %d upstreams (delta: %+d)",
             len(self.proxies),
             added,
         )
 
+    @property
+    def sorted_hosts(self) -> List[str]:
+        """hosts in sorted order, cached until the pool membership changes"""
+        if self._sorted_hosts is None:
+            self._sorted_hosts = sorted(p.host for p in self.proxies)
+        return self._sorted_hosts
+
+    @staticmethod
+    def _best_of(
+        candidates: Sequence[Optional[ProxyNode]],
+    ) -> Optional[ProxyNode]:
+        """pick the candidate with the lowest latency + load score"""
+        best = None
+        best_score = float("inf")
+        for p in candidates:
+            if p is None:
+                continue
+            score = p.latency + 0.1 * p.active_connections
+            if score < best_score:
+                best = p
+                best_score = score
+        return best
+
+    @staticmethod
+    def _is_excluded(exclude: Optional[List[ProxyNode]], p: ProxyNode) -> bool:
+        """identity scan; exclude lists are at most a few retries long"""
+        if exclude:
+            for q in exclude:
+                if q is p:
+                    return True
+        return False
+
+    def _rebuild_alias(self):
+        """
+        rebuild the weighted sampler from current health and latency state
+
+        the preferred tier is the healthy nodes under the latency cap (or
+        all probed-healthy nodes when none qualify), weighted by inverse
+        latency and laid out as a Vose alias table: each draw is then one
+        randrange, one random and two list indexes, independent of pool
+        size. probes and reloads mark the table dirty; it is rebuilt here
+        on the next selection
+        """
+        # one fused scan builds the healthy list, the under-cap tier and its
+        # weights together, instead of three passes re-reading the same
+        # attributes
+        healthy = []
+        tier = []
+        weights = []
+        for p in self.proxies:
+            if not p.is_healthy:
+                continue
+            lat = p.latency
+            if lat < 0:
+                continue
+            healthy.append(p)
+            if lat <= MAX_LATENCY:
+                tier.append(p)
+                weights.append(1.0 / max(lat, 0.5))
+        if not tier:
+            tier = healthy
+            weights = [1.0 / max(p.latency, 0.5) for p in healthy]
+        self._healthy_nodes = healthy
+        self._alias_nodes = tier
+        # position maps let _pick fold an exclude list into one int bitmask
+        # per call; any pool size works since python ints are unbounded
+        self._healthy_pos = {id(p): k for k, p in enumerate(healthy)}
+        self._alias_pos = {id(p): k for k, p in enumerate(tier)}
+        n = len(tier)
+        prob = [1.0] * n
+        idx = array("L", range(n))
+        if n > 1:
+            # vose's algorithm: scale weights to mean 1, then pair each
+            # under-full column with an over-full donor
+            scale = n / sum(weights)
+            scaled = [w * scale for w in weights]
+            small = [i for i, w in enumerate(scaled) if w < 1.0]
+            large = [i for i, w in enumerate(scaled) if w >= 1.0]
+            while small and large:
+                s = small.pop()
+                big = large.pop()
+                prob[s] = scaled[s]
+                idx[s] = big
+                scaled[big] -= 1.0 - scaled[s]
+                (small if scaled[big] < 1.0 else large).append(big)
+        # the tables live in flat C arrays: a draw indexes contiguous ints
+        # rather than chasing list-of-object pointers. probabilities are
+        # fixed-point against 2**32 so the draw compares raw random bits
+        # with no float conversion; a full column stores 2**32 itself,
+        # which a 32-bit draw can never reach
+        self._alias_prob = array(
+            "Q", (min(int(p * 4294967296.0), 4294967296) for p in prob)
+        )
+        self._alias_idx = idx
+        self._alias_dirty = False
+
+    def _draw(
+        self,
+        nodes: List[ProxyNode],
+        weighted: bool,
+        exclude_mask: int,
+    ) -> Optional[ProxyNode]:
+        """
+        one O(1) draw from a tier, rejection-sampling around the excluded
+        positions; returns None when a few tries all land on excluded bits
+        """
+        # bind everything the loop touches to locals: each iteration is then
+        # pure LOAD_FASTs around one C call, with no attribute or global
+        # lookups left in the hot path. a single 64-bit draw provides both
+        # the column index (high bits) and the alias coin (low bits), and
+        # the exclusion test is one shift-and-mask on the final index
+        n = len(nodes)
+        getrandbits = self._rng.getrandbits
+        prob = self._alias_prob
+        idx = self._alias_idx
+        for _ in range(4):
+            r = getrandbits(64)
+            i = (r >> 32) % n
+            if weighted and (r & 0xFFFFFFFF) >= prob[i]:
+                i = idx[i]
+            if not exclude_mask >> i & 1:
+                return nodes[i]
+        return None
+
+    def _draw_one(self, nodes: List[ProxyNode]) -> ProxyNode:
+        """one weighted draw with no exclusions; always lands on a node"""
+        r = self._rng.getrandbits(64)
+        i = (r >> 32) % len(nodes)
+        if (r & 0xFFFFFFFF) >= self._alias_prob[i]:
+            i = self._alias_idx[i]
+        return nodes[i]
+
+    def _pick(
+        self,
+        active_count: int,
+        exclude: Optional[List[ProxyNode]],
+    ) -> ProxyNode:
+        """draw PICK_CHOICES candidates from the winning tier and score them"""
+        healthy = self._healthy_nodes
+        if not healthy:
+            # fallback to any non-excluded proxy, then to anything at all
+            if exclude:
+                pool = [p for p in self.proxies if not self._is_excluded(exclude, p)]
+                if pool:
+                    return self._rng.choice(pool)
+            return self._rng.choice(self.proxies)
+
+        # high usage spreads uniformly across all healthy nodes; otherwise
+        # draws come latency-weighted from the alias tier. the final pick is
+        # power-of-d-choices by latency + load score, which tightens tail
+        # latency when upstreams are unevenly loaded
+        if active_count >= HIGH_USAGE_THRESHOLD:
+            nodes, weighted, pos = healthy, False, self._healthy_pos
+        else:
+            nodes, weighted, pos = self._alias_nodes, True, self._alias_pos
+
+        # fold the exclude list into a bitmask over tier positions once, so
+        # each draw tests exclusion with a shift instead of an identity scan
+        exclude_mask = 0
+        if exclude:
+            for q in exclude:
+                k = pos.get(id(q))
+                if k is not None:
+                    exclude_mask |= 1 << k
+
+        if exclude_mask.bit_count() < len(nodes):
+            cands = [
+                self._draw(nodes, weighted, exclude_mask) for _ in range(PICK_CHOICES)
+            ]
+        else:
+            # whole tier excluded; skip straight to the filtered fallback
+            cands = []
+        chosen = self._best_of(cands)
+        if chosen is not None:
+            return chosen
+        # heavy exclusion defeated rejection sampling: rare, so the filtered
+        # scans are fine here. prefer non-excluded healthy, then any
+        # non-excluded proxy, and ignore exclude only when it rules out the
+        # entire pool — retries must not be handed back an upstream that
+        # just failed while untried ones remain
+        best = self._best_of([p for p in healthy if not self._is_excluded(exclude, p)])
+        if best is not None:
+            return best
+        pool = [p for p in self.proxies if not self._is_excluded(exclude, p)]
+        if pool:
+            return self._rng.choice(pool)
+        return self._rng.choice(self.proxies)
+
+    def _fast_pick(self) -> ProxyNode:
+        """
+        specialised picker for the dominant call shape: no sticky client,
+        no exclusions, low usage. skips the tier choice, the exclude-mask
+        fold and the candidate-list allocation of the generic path
+        """
+        if self._alias_dirty:
+            self._rebuild_alias()
+        nodes = self._alias_nodes
+        if not nodes:
+            return self._rng.choice(self.proxies)
+        best = self._draw_one(nodes)
+        best_score = best.latency + 0.1 * best.active_connections
+        for _ in range(PICK_CHOICES - 1):
+            p = self._draw_one(nodes)
+            score = p.latency + 0.1 * p.active_connections
+            if score < best_score:
+                best = p
+                best_score = score
+        if best.is_healthy or not self._healthy_nodes:
+            return best
+        # stale table carried a tripped node; the rebuild snapshots only
+        # healthy nodes, so the retry can't recurse again
+        self._rebuild_alias()
+        return self._fast_pick()
+
+    def _expire_sticky(self, now: float):
+        """
+        drain expired and overflow sticky entries from the front of the map
+
+        entries are inserted with a fixed ttl and never refreshed, so the
+        ordered dict is already sorted by expiry: popping from the front
+        until the head is live is the same amortised sweep a ttl heap would
+        give, without the side structure to keep in sync
+        """
+        sticky = self._sticky_map
+        while sticky:
+            oldest = next(iter(sticky))
+            if sticky[oldest][1] > now and len(sticky) <= STICKY_MAX_CLIENTS:
+                break
+            del sticky[oldest]
+
     def get_proxy(
         self,
         active_count: int = 0,
         client_id: Optional[str] = None,
         exclude: Optional[List[ProxyNode]] = None,
+        _now: Optional[float] = None,
     ) -> Optional[ProxyNode]:
-        """select the best available upstream proxy for a connection"""
+        """
+        select the best available upstream proxy for a connection
+
+        _now injects a monotonic timestamp for the sticky bookkeeping; left
+        unset, the clock is read once per call and serves both the expiry
+        check and the new entry's expiry
+        """
         if not self.proxies:
             return None
 
-        # sticky session lookup
+        # dominant call shape goes straight to the specialised picker
+        if client_id is None and active_count == 0 and exclude is None:
+            if len(self.proxies) == 1:
+                return self.proxies[0]
+            return self._fast_pick()
+
+        # sticky session lookup; one clock read serves lookup and store
+        now = 0.0
         if STICKY_TTL > 0 and client_id:
+            now = _now if _now is not None else time.monotonic()
             entry = self._sticky_map.get(client_id)
             if entry:
                 node, expiry = entry
-                if time.time() < expiry and node.is_healthy:
+                if now < expiry and node.is_healthy:
                     return node
                 del self._sticky_map[client_id]
 
-        exclude_set = set(id(p) for p in (exclude or []))
-
-        # 1. filter healthy (and not excluded)
-        healthy = [
-            p
-            for p in self.proxies
-            if p.is_healthy and p.latency >= 0 and id(p) not in exclude_set
-        ]
-
-        if not healthy:
-            # fallback to any non-excluded proxy
-            pool = [p for p in self.proxies if id(p) not in exclude_set]
-            if not pool:
-                pool = self.proxies
-            chosen = random.choice(pool)
+        # single-upstream fast path: every tier collapses to the same node,
+        # and the fallback tier returns it even when unhealthy or excluded,
+        # so skip the scan entirely
+        if len(self.proxies) == 1:
+            chosen = self.proxies[0]
         else:
-            # 2. filter by latency
-            low_latency = [p for p in healthy if p.latency <= MAX_LATENCY]
-
-            # 3. decision logic
-            if active_count >= HIGH_USAGE_THRESHOLD:
-                chosen = random.choice(healthy)
-            elif low_latency:
-                chosen = random.choice(low_latency)
-            else:
-                chosen = random.choice(healthy)
-
-        # record sticky mapping
+            if self._alias_dirty:
+                self._rebuild_alias()
+            chosen = self._pick(active_count, exclude)
+            if not chosen.is_healthy and self._healthy_nodes:
+                # a breaker tripped since the last rebuild and the table
+                # still carried the node; refresh once and redraw
+                self._rebuild_alias()
+                chosen = self._pick(active_count, exclude)
+
+        # record sticky mapping, draining expired/overflow entries while
+        # we're here. no displacement pop is needed: the lookup above either
+        # returned the live entry or deleted the stale one, so the key is
+        # never present here and insertion lands at the back as required
         if STICKY_TTL > 0 and client_id:
-            self._sticky_map[client_id] = (chosen, time.time() + STICKY_TTL)
+            self._sticky_map[client_id] = (chosen, now + STICKY_TTL)
+            self._expire_sticky(now)
 
         return chosen
 
     def get_all_proxies(self) -> List[dict]:
         """return serializable status info for all proxies"""
-        return [
+        # dashboards poll this much faster than node state meaningfully
+        # changes; a short ttl snapshot avoids rebuilding N 14-key dicts per
+        # poll. a time bound is used rather than dirty flags because the
+        # tunnel path bumps byte counters on nodes directly
+        now = time.monotonic()
+        if now - self._status_cache_time < STATUS_CACHE_TTL:
+            return self._status_cache
+        self._status_cache = [
             {
                 "host": p.host,
                 "port": p.port,
@@ -248,79 +764,148 @@ class ProxyManager:
             }
             for p in self.proxies
         ]
+        self._status_cache_time = now
+        return self._status_cache
+
+    def top_k_by_latency(self, k: int) -> List[ProxyNode]:
+        """
+        the k fastest probed-healthy proxies, best first
+
+        nsmallest keeps a k-entry heap over one pass, O(N log k) against
+        the O(N log N) of sorting the whole pool for a top-10 panel
+        """
+        return heapq.nsmallest(
+            k,
+            (p for p in self.proxies if p.is_healthy and p.latency >= 0),
+            key=_LAT_KEY,
+        )
 
     async def check_proxy(self, node: ProxyNode):
         """run a connect health check against a single proxy node"""
-        start = time.time()
+        async with self._probe_sem:
+            await self._probe_node(node)
+
+    @staticmethod
+    async def _probe_io(node: ProxyNode):
+        """connect, send the probe and read the response headers"""
+        reader, writer = await asyncio.open_connection(node.host, node.port)
         try:
-            reader, writer = await asyncio.wait_for(
-                asyncio.open_connection(node.host, node.port),
-                timeout=5.0,
-            )
             # send a connect to a known target to verify proxy actually works
-            req = b"CONNECT httpbin.org:443 HTTP/1.1\r\nHost: httpbin.org:443\r\n"
-            if node.auth:
-                req += f"Proxy-Authorization: Basic {node.auth}\r\n".encode()
-            req += b"\r\n"
-            writer.write(req)
+            writer.write(node.probe_req)
             await writer.drain()
+            # readuntil keeps the terminator scan in C and raises on eof or
+            # oversized headers, which the caller treats as unhealthy
+            response = await reader.readuntil(b"\r\n\r\n")
+        except BaseException:
+            # includes the cancellation from an expired outer deadline
+            writer.close()
+            raise
+        return reader, writer, response
 
-            response = bytearray()
-            while b"\r\n\r\n" not in response:
-                chunk = await asyncio.wait_for(reader.read(4096), timeout=5.0)
-                if not chunk:
-                    break
-                response.extend(chunk)
-                if len(response) > 16384:
-                    break
+    async def _probe_node(self, node: ProxyNode):
+        """the actual probe, run under the concurrency cap"""
+        start = time.time()
 
-            writer.close()
-            await writer.wait_closed()
+        # a warm pooled socket is itself the probe: the upstream keeping the
+        # connection open means it is alive, with no new handshake. the
+        # established CONNECT tunnel can't be re-probed in-band, so a full
+        # re-check happens once the socket ages out
+        pooled = self._probe_sockets.pop(node.url, None)
+        if pooled is not None:
+            p_reader, p_writer, created = pooled
+            if (
+                start - created < PROBE_SOCKET_TTL
+                and not p_reader.at_eof()
+                and not p_writer.is_closing()
+            ):
+                self._probe_sockets[node.url] = pooled
+                node.is_healthy = True
+                node.consecutive_failures = 0
+                node.last_checked = start
+                return
+            p_writer.close()
 
-            first_line = response.split(b"\r\n", 1)[0]
-            if b"200" in first_line:
-                node.latency = (time.time() - start) * 1000
+        try:
+            # one deadline covers connect, write and read: a single timer
+            # handle per probe instead of one per awaited step
+            reader, writer, response = await asyncio.wait_for(
+                self._probe_io(node),
+                timeout=5.0,
+            )
+            if response.startswith((b"HTTP/1.1 200", b"HTTP/1.0 200")):
+                node.record_latency((time.time() - start) * 1000)
                 node.is_healthy = True
                 node.consecutive_failures = 0
+                # keep the socket warm for the next cycles
+                self._probe_sockets[node.url] = (reader, writer, start)
             else:
                 node.is_healthy = False
                 node.latency = -1.0
+                # no wait_closed: waiting out the FIN exchange costs an rtt
+                # per failed probe and the transport finishes closing on its
+                # own in the background
+                writer.close()
         except Exception:  # pylint: disable=broad-exception-caught
             node.is_healthy = False
             node.latency = -1.0
         finally:
-            node.last_checked = time.time()
+            # the probe start is accurate enough for staleness tracking and
+            # saves a clock read per probe
+            node.last_checked = start
+            self._alias_dirty = True
+
+    async def close(self):
+        """release pooled resources held by the manager"""
+        for _, writer, _ in self._probe_sockets.values():
+            writer.close()
+        self._probe_sockets.clear()
+        if self._reload_handle is not None:
+            self._reload_handle.cancel()
+            self._reload_handle = None
+        self._watcher.stop()
+
+    @staticmethod
+    async def _fetch_location(node: ProxyNode) -> dict:
+        """fetch the geo-lookup json through the proxy with a bare socket"""
+        reader, writer = await asyncio.open_connection(node.host, node.port)
+        try:
+            # absolute-form GET: http proxies forward it without a CONNECT
+            writer.writelines(
+                [
+                    b"GET http://ip-api.com/json/ HTTP/1.1\r\nHost: ip-api.com\r\n",
+                    node.auth_line,
+                    b"Connection: close\r\n\r\n",
+                ]
+            )
+            await writer.drain()
+            header = await reader.readuntil(b"\r\n\r\n")
+            if not header.startswith((b"HTTP/1.1 200", b"HTTP/1.0 200")):
+                raise ConnectionError("geo lookup refused")
+            length = 0
+            for line in header.split(b"\r\n"):
+                if line[:15].lower() == b"content-length:":
+                    length = int(line[15:])
+                    break
+            body = await reader.readexactly(length) if length else await reader.read()
+            return cast(dict, json_loads(body))
+        finally:
+            writer.close()
 
     async def resolve_location(self, node: ProxyNode):
         """resolve the geographic location and exit ip of a proxy node"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    "http://ip-api.com/json/",
-                    proxy=node.url,
-                    timeout=aiohttp.ClientTimeout(total=10),
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        cc = data.get("countryCode")
-                        node.country_code = cc
-                        node.exit_ip = data.get("query")
-                        node.location = (
-                            f"{data.get('city', 'Unknown')}, {cc or 'Unknown'}"
-                        )
+            data = await asyncio.wait_for(self._fetch_location(node), timeout=10.0)
+            cc = data.get("countryCode")
+            node.country_code = cc
+            node.exit_ip = data.get("query")
+            node.location = f"{data.get('city', 'Unknown')}, {cc or 'Unknown'}"
         except Exception:  # pylint: disable=broad-exception-caught
             pass
 
-    def _cleanup_sticky(self):
-        """remove expired entries from the sticky session map"""
-        now = time.time()
-        expired = [k for k, (_, exp) in self._sticky_map.items() if now >= exp]
-        for k in expired:
-            del self._sticky_map[k]
-
     async def health_check_loop(self):
         """periodically check proxy health and reload proxy file"""
         logger.info("starting health check loop")
+        watching = self._watcher.start()
         # initial check
         if self.proxies:
             tasks = [self.check_proxy(n) for n in self.proxies]
@@ -332,8 +917,10 @@ class ProxyManager:
         while True:
             await asyncio.sleep(HEALTH_CHECK_INTERVAL)
 
-            # hot-reload proxy file
-            self._reload_file()
+            # hot-reload happens in the watcher callback when the watch is
+            # active; otherwise fall back to the per-tick mtime poll
+            if not watching:
+                self._reload_file()
 
             if not self.proxies:
                 continue
@@ -346,6 +933,3 @@ class ProxyManager:
             if loc_tasks:
                 tasks.extend(loc_tasks)
             await asyncio.gather(*tasks, return_exceptions=True)
-
-            # cleanup expired sticky entries
-            self._cleanup_sticky()
@@ -55,11 +55,33 @@ def test_verify_signature_wrong_sig():
         assert extracted_cid == cid
 
 
+def test_verify_signature_secret_rotation():
+    """test that verification tracks a changed service secret"""
+    cid = "client-1"
+    ts = str(int(time.time()))
+
+    for secret in (b"first-secret", b"second-secret"):
+        sig = _make_signature(cid, ts, secret)
+        with patch("proxy_guard.auth.SERVICE_SECRET", secret):
+            is_valid, _ = verify_signature(f"{cid}:{ts}:{sig}")
+            assert is_valid is True
+
+    # a signature made with the old secret must fail under the new one
+    old_sig = _make_signature(cid, ts, b"first-secret")
+    with patch("proxy_guard.auth.SERVICE_SECRET", b"second-secret"):
+        is_valid, _ = verify_signature(f"{cid}:{ts}:{old_sig}")
+        assert is_valid is False
+
+
 def test_verify_signature_malformed():
     """test that a malformed auth value is rejected"""
     with patch("proxy_guard.auth.SERVICE_SECRET", b"test-secret"):
         is_valid, _ = verify_signature("garbage")
         assert is_valid is False
+        # superscript digits pass isdigit but not int(); must not raise
+        is_valid, cid = verify_signature("client-1:²³:abcdef")
+        assert is_valid is False
+        assert cid == "client-1"
 
 
 def test_parse_auth_header_pg_auth():
@@ -23,10 +23,7 @@ async def test_handle_client_auth_disabled():
     reader = AsyncMock()
     writer = _make_mock_writer()
 
-    reader.read.side_effect = [
-        b"CONNECT example.com:80 HTTP/1.1\r\n\r\n",
-        b"",
-    ]
+    reader.readuntil.return_value = b"CONNECT example.com:80 HTTP/1.1\r\n\r\n"
 
     mock_proxy = MagicMock()
     mock_proxy.host = "1.2.3.4"
@@ -65,10 +62,7 @@ async def test_handle_client_auth_enabled_no_header():
     reader = AsyncMock()
     writer = _make_mock_writer()
 
-    reader.read.side_effect = [
-        b"CONNECT example.com:80 HTTP/1.1\r\n\r\n",
-        b"",
-    ]
+    reader.readuntil.return_value = b"CONNECT example.com:80 HTTP/1.1\r\n\r\n"
 
     with (
         patch("proxy_guard.server.ENABLE_AUTH", True),
@@ -24,10 +24,7 @@ async def test_handle_client_retries_on_upstream_failure():
     reader = AsyncMock()
     writer = _make_mock_writer()
 
-    reader.read.side_effect = [
-        b"CONNECT example.com:443 HTTP/1.1\r\n\r\n",
-        b"",
-    ]
+    reader.readuntil.return_value = b"CONNECT example.com:443 HTTP/1.1\r\n\r\n"
 
     proxy1 = MagicMock()
     proxy1.host = "1.2.3.4"
@@ -99,10 +96,7 @@ async def test_handle_client_all_retries_exhausted():
     reader = AsyncMock()
     writer = _make_mock_writer()
 
-    reader.read.side_effect = [
-        b"CONNECT example.com:443 HTTP/1.1\r\n\r\n",
-        b"",
-    ]
+    reader.readuntil.return_value = b"CONNECT example.com:443 HTTP/1.1\r\n\r\n"
 
     proxy = MagicMock()
     proxy.host = "1.2.3.4"
@@ -136,10 +130,7 @@ async def test_handle_client_timeout_returns_504():
     reader = AsyncMock()
     writer = _make_mock_writer()
 
-    reader.read.side_effect = [
-        b"CONNECT example.com:443 HTTP/1.1\r\n\r\n",
-        b"",
-    ]
+    reader.readuntil.return_value = b"CONNECT example.com:443 HTTP/1.1\r\n\r\n"
 
     proxy = MagicMock()
     proxy.host = "1.2.3.4"